@@ -0,0 +1,70 @@
+# Runs the screens on every execution backend, checks that the results match pandas and
+# reports the time each one takes. Uses the configured data root, e.g.
+#     python -m benchmarks.bench_backends --as-of 20240628
+import argparse
+import logging
+import time
+
+import pandas as pd
+import pendulum
+
+from investment_buddy.backends import BACKENDS
+from investment_buddy.filterer import (
+    DataFilters,
+    price_files,
+    read_price_files,
+    reconcile_bse,
+)
+
+SCREENS = {
+    "df_200p_val_quarter": "apply_200p_quarter_filter",
+    "df_300p_val_month": "apply_300p_month_filter",
+    "df_200p_val_twice": "apply_200p_twice_6mos",
+    "df_200p_val_thrice": "apply_200p_thrice_12mos",
+}
+
+
+def normalise(df):
+    # only the row order may differ between backends; dtypes have to match pandas
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--as-of", help="YYYYMMDD, defaults to today")
+    parser.add_argument("--backends", nargs="*", default=list(BACKENDS))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    as_of_date = (
+        pendulum.from_format(args.as_of, "YYYYMMDD") if args.as_of else pendulum.today()
+    )
+    start = time.perf_counter()
+    df_all = reconcile_bse(read_price_files(price_files()))
+    print(f"load: {time.perf_counter() - start:.2f}s ({len(df_all)} rows)")
+
+    results = dict()
+    for backend in args.backends:
+        start = time.perf_counter()
+        data_filter = DataFilters(as_of_date, df_all=df_all, backend=backend)
+        data_filter.df_prev = None
+        setup = time.perf_counter() - start
+        for attr, method in SCREENS.items():
+            getattr(data_filter, method)()
+        elapsed = time.perf_counter() - start
+        print(f"{backend}: {elapsed:.2f}s (setup {setup:.2f}s)")
+        results[backend] = {
+            attr: normalise(getattr(data_filter, attr)) for attr in SCREENS
+        }
+
+    reference = results.get("pandas")
+    for backend, frames in results.items():
+        if reference is None or backend == "pandas":
+            continue
+        for attr, df in frames.items():
+            pd.testing.assert_frame_equal(df, reference[attr], check_exact=False)
+        print(f"{backend}: results match pandas")
+
+
+if __name__ == "__main__":
+    main()
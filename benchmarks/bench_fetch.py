@@ -0,0 +1,119 @@
+# End-to-end fetch throughput against a local replay of recorded traffic.
+#
+# Record captures once by running the normal code through a recording server,
+#     python -m investment_buddy replay captures/ --record
+# with INVESTMENT_BUDDY_{NSE,BSE,MONEYCONTROL}_URL pointing at it (e.g. run
+# `python -m investment_buddy download`). Then benchmark with
+#     python -m benchmarks.bench_fetch captures/ --latency 0.05 --not-found-rate 0.1
+import argparse
+import logging
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pendulum
+
+from investment_buddy.config import set_data_root
+from investment_buddy.replay import ReplayServer
+
+
+def captured_dates(capture_dir, host):
+    dates = {
+        m.group(1)
+        for p in (Path(capture_dir) / host).rglob("*")
+        for m in [re.search(r"_(\d{8})_F_", p.name)]
+        if m
+    }
+    return sorted(pendulum.from_format(d, "YYYYMMDD") for d in dates)
+
+
+def bench_downloader(downloader_cls, host, capture_dir):
+    dates = captured_dates(capture_dir, host)
+    if not dates:
+        return None
+    downloader = downloader_cls(bootstrap=False)
+    start = time.perf_counter()
+    downloader.download_date_range(dates[0], dates[-1].add(days=1))
+    elapsed = time.perf_counter() - start
+    n_days = len(pd.bdate_range(dates[0].date(), dates[-1].date()))
+    return n_days, elapsed
+
+
+def bench_scraper(workers, source_data, limit):
+    from investment_buddy.scraper import scrape_candidate
+
+    df_index = pd.read_csv(source_data / "company_info.csv").rename(columns=str.lower)
+    candidates = list(zip(df_index["isin"], df_index["name"]))[:limit]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        props = list(executor.map(lambda c: scrape_candidate(*c), candidates))
+    found = sum(p is not None and "market_cap" in p for p in props)
+    return len(candidates), found, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("capture_dir")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--not-found-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=None)
+    parser.add_argument("--scrape-workers", type=int, default=8)
+    parser.add_argument("--max-companies", type=int, default=200)
+    parser.add_argument(
+        "--company-index",
+        default="data",
+        help="directory with keys.csv and a company_info.csv of captured companies",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    from investment_buddy.downloader import BseDownloader, NseDownloader
+
+    server = ReplayServer(
+        args.capture_dir,
+        latency=args.latency,
+        jitter=args.jitter,
+        not_found_rate=args.not_found_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_delay=5,
+        max_rps=args.max_rps,
+    )
+    with server, tempfile.TemporaryDirectory() as data_root:
+        server.use_for_all_hosts()
+        source_data = Path(args.company_index)
+        for name in ["keys.csv", "company_info.csv"]:
+            shutil.copy(source_data / name, data_root)
+        set_data_root(data_root)
+
+        for downloader_cls, host in [
+            (NseDownloader, "nsearchives.nseindia.com"),
+            (BseDownloader, "www.bseindia.com"),
+        ]:
+            result = bench_downloader(downloader_cls, host, args.capture_dir)
+            if result is None:
+                print(f"{downloader_cls.exchange}: no captures")
+                continue
+            n_days, elapsed = result
+            print(
+                f"{downloader_cls.exchange}: {n_days} days in {elapsed:.2f}s "
+                f"({n_days / elapsed:.1f} days/s)"
+            )
+
+        n, found, elapsed = bench_scraper(
+            args.scrape_workers, source_data, args.max_companies
+        )
+        print(
+            f"scraper: {n} companies ({found} found) in {elapsed:.2f}s "
+            f"({n / elapsed:.1f} companies/s, {args.scrape_workers} workers)"
+        )
+        print(f"server: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# Checks that every execution backend returns exactly what pandas does, on a small
+# synthetic data root written to a temporary directory, so no downloaded data is needed:
+#     python -m benchmarks.check_backends
+# The data includes the awkward cases the columnar backends have to mirror: missing
+# closes, zero-volume periods (x/0 and 0/0 ratios), rows with a missing isin and BSE
+# files in both the old and the new layout. Exits non-zero on the first mismatch.
+import argparse
+import logging
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pendulum
+
+from benchmarks.bench_backends import SCREENS, normalise
+from investment_buddy.backends import BACKENDS
+from investment_buddy.config import data_path, set_data_root
+from investment_buddy.filterer import (
+    DataFilters,
+    price_files,
+    read_price_files,
+    reconcile_bse,
+)
+
+START, AS_OF = "2025-01-01", "2026-06-26"
+PRIOR_DATES = ["2026-05-14", "2026-06-05"]
+BSE_NEW_FORMAT = pd.Timestamp("2025-07-08")
+
+
+def synthetic_prices(n_securities=24, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(START, AS_OF)
+    codes = np.arange(n_securities)
+    df = pd.DataFrame(
+        {
+            "code": np.tile(codes, len(dates)),
+            "date": np.repeat(dates, n_securities),
+        }
+    )
+    close = rng.lognormal(4, 0.3, len(df))
+    volume = rng.integers(1_000, 100_000, len(df))
+    # monthly spikes so that the 200%/300% screens have hits to compare
+    month = df.date.dt.to_period("M").astype(str)
+    spikes = (
+        pd.Series(rng.random(len(df)) < 0.05)
+        .groupby([df.code, month])
+        .transform("any")
+    )
+    volume = np.where(spikes, volume * 6, volume)
+    close = np.where(spikes, close * 2.5, close)
+    # a security with no trades for two months gives 0/0 and x/0 ratios
+    volume = np.where((df.code == 1) & month.isin(["2026-02", "2026-03"]), 0, volume)
+    close = np.where(rng.random(len(df)) < 0.01, np.nan, close)
+    df = df.assign(
+        symbol=lambda df: "S" + df.code.astype(str),
+        isin=lambda df: "INE" + df.code.astype(str).str.zfill(6),
+        alt_id=lambda df: 500000 + df.code,
+        exchange=np.where(df.code % 2 == 0, "NSE", "BSE"),
+        open=close,
+        high=close,
+        low=close,
+        close=close,
+        volume=volume,
+        year=df.date.dt.year,
+        month=df.date.dt.month,
+        day=df.date.dt.day,
+        ym=df.date.dt.year * 100 + df.date.dt.month,
+    )
+    df.loc[df.code == 3, "isin"] = np.nan
+    df.loc[df.exchange == "NSE", "alt_id"] = np.nan
+    # old BSE layout (the July 8, 2024 change, moved into this range): the scrip code
+    # sits in isin and there is no alt_id
+    old_bse = (df.exchange == "BSE") & (df.date < BSE_NEW_FORMAT)
+    df.loc[old_bse, "symbol"] = df.loc[old_bse, "alt_id"].astype(int).astype(str)
+    df.loc[old_bse, "isin"] = df.loc[old_bse, "symbol"]
+    df.loc[old_bse, "alt_id"] = np.nan
+    return df.drop(columns="code")
+
+
+def write_data_root(df):
+    for (exchange, date), df_day in df.groupby(["exchange", "date"]):
+        path = data_path(exchange.lower(), f"{date:%Y%m%d}.csv")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df_day.assign(date=date.strftime("%Y-%m-%d")).to_csv(path, index=False)
+    data_path("filtered").mkdir(parents=True, exist_ok=True)
+
+
+def compare(backend, name, df, reference):
+    try:
+        pd.testing.assert_frame_equal(normalise(df), normalise(reference))
+    except AssertionError:
+        print(f"{backend}: {name} differs from pandas")
+        raise
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="*", default=list(BACKENDS))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as root:
+        set_data_root(root)
+        write_data_root(synthetic_prices())
+        df_all = reconcile_bse(read_price_files(price_files()))
+        as_of_date = pendulum.parse(AS_OF)
+
+        # prior-day exports earlier in the quarter, so that apply_all_filters also
+        # exercises the df_prev merges while still leaving new candidates to compare
+        for prior_date in PRIOR_DATES:
+            prior = DataFilters(pendulum.parse(prior_date), df_all=df_all)
+            prior.apply_all_filters()
+
+        reference = None
+        for backend in ["pandas"] + [b for b in args.backends if b != "pandas"]:
+            try:
+                data_filter = DataFilters(as_of_date, df_all=df_all, backend=backend)
+            except ImportError as err:
+                print(f"{backend}: skipped ({err})")
+                continue
+            data_filter.df_prev = None
+            for method in SCREENS.values():
+                getattr(data_filter, method)()
+            screens = {attr: getattr(data_filter, attr) for attr in SCREENS}
+            data_filter = DataFilters(as_of_date, df_all=df_all, backend=backend)
+            data_filter.apply_all_filters(export=False)
+            screens["df_all_filtered"] = data_filter.df_all_filtered
+
+            if reference is None:
+                reference = screens
+                hits = ", ".join(f"{k}={len(v)}" for k, v in screens.items())
+                print(f"pandas: {hits}")
+                continue
+            for name, df in screens.items():
+                compare(backend, name, df, reference[name])
+            print(f"{backend}: results match pandas")
+        set_data_root(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Checks that each threshold sweep, run at the default thresholds, picks exactly the
+# candidates of the apply_* screen it tunes, on the synthetic data of check_backends:
+#     python -m benchmarks.check_sweeps
+# Exits non-zero on the first mismatch.
+import logging
+import tempfile
+
+import pandas as pd
+import pendulum
+
+from benchmarks.check_backends import synthetic_prices, write_data_root
+from investment_buddy.config import set_data_root
+from investment_buddy.filterer import (
+    DataFilters,
+    price_files,
+    read_price_files,
+    reconcile_bse,
+)
+from investment_buddy.sweep import KEYS
+
+# month and quarter boundaries, plus days where a missing close falls in the last period
+AS_OF_DATES = ["2026-03-31", "2026-04-02", "2026-04-30", "2026-05-15", "2026-06-26"]
+SWEEPS = {
+    "sweep_200p_quarter_filter": ("apply_200p_quarter_filter", "df_200p_val_quarter"),
+    "sweep_200p_twice_6mos": ("apply_200p_twice_6mos", "df_200p_val_twice"),
+}
+
+
+def screen_keys(df):
+    return set(map(tuple, df[KEYS].astype(object).to_numpy().tolist()))
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as root:
+        set_data_root(root)
+        write_data_root(synthetic_prices())
+        df_all = reconcile_bse(read_price_files(price_files()))
+        set_data_root(None)
+
+    for as_of in AS_OF_DATES:
+        data_filter = DataFilters(pendulum.parse(as_of), df_all=df_all)
+        data_filter.df_prev = None
+        for sweep, (method, attr) in SWEEPS.items():
+            df_sweep = getattr(data_filter, sweep)()
+            assert len(df_sweep) == 1, f"{sweep}: expected a single default combination"
+            swept = set(map(tuple, df_sweep.candidates.iloc[0]))
+            getattr(data_filter, method)()
+            screened = screen_keys(getattr(data_filter, attr))
+            if swept != screened:
+                print(f"{as_of} {sweep}: only in sweep {sorted(swept - screened)}")
+                print(f"{as_of} {sweep}: only in screen {sorted(screened - swept)}")
+                raise SystemExit(1)
+            print(f"{as_of} {sweep}: {len(swept)} candidates, matches {method}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+from investment_buddy.crawler import CompanyIndexCrawler
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+# Pass refresh_index=True to re-crawl the letter pages before scraping company details.
+crawler = CompanyIndexCrawler(executor="thread")
+crawler.crawl(refresh_index=False)
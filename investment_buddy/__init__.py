@@ -0,0 +1,23 @@
+import importlib
+
+# Submodules pull in pandas, requests and friends, so top level names are resolved on
+# first access rather than at import time.
+_lazy_attrs = {
+    "NseDownloader": "investment_buddy.downloader",
+    "BseDownloader": "investment_buddy.downloader",
+    "DataFilters": "investment_buddy.filterer",
+    "PageFinder": "investment_buddy.scraper",
+    "scrape_metrics": "investment_buddy.scraper",
+    "Pipeline": "investment_buddy.pipeline",
+    "CompanyIndexCrawler": "investment_buddy.crawler",
+    "ScreeningService": "investment_buddy.service",
+    "ScreeningClient": "investment_buddy.service",
+}
+
+__all__ = list(_lazy_attrs)
+
+
+def __getattr__(name):
+    if name in _lazy_attrs:
+        return getattr(importlib.import_module(_lazy_attrs[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,3 @@
+from investment_buddy.cli import main
+
+main()
@@ -0,0 +1,265 @@
+import pandas as pd
+
+KEYS = ["exchange", "symbol", "isin"]
+RATIO_COLUMNS = [
+    "value",
+    "volume",
+    "close",
+    "value_lag",
+    "volume_lag",
+    "close_lag",
+    "value_ratio",
+    "volume_ratio",
+    "close_ratio",
+]
+
+
+# Declarative form of the ratio screens. Prices from `start` onwards are rolled up per
+# security and period, compared with the previous period, and rows beating every
+# threshold (strict >) are kept. With min_count set, the screen instead returns the
+# securities with at least that many qualifying periods. Each backend compiles this same
+# description, so the screen logic lives in DataFilters only once.
+class RatioScreen(object):
+    def __init__(self, period, start, thresholds, min_count=None):
+        assert period in ("month", "quarter"), "period must be month or quarter"
+        self.period = period
+        self.start = pd.Timestamp(start)
+        self.thresholds = thresholds
+        self.min_count = min_count
+
+    def __repr__(self):
+        return (
+            f"RatioScreen({self.period}, {self.start.date()}, {self.thresholds}, "
+            f"{self.min_count})"
+        )
+
+
+class PandasBackend(object):
+    name = "pandas"
+
+    def __init__(self, data_filter):
+        self.data_filter = data_filter
+
+    def run(self, screen):
+        df = self.data_filter.period_ratios(screen.start, screen.period)
+        mask = df.value_lag.notna()
+        for column, threshold in screen.thresholds.items():
+            mask &= df[column] > threshold
+        df = df[mask]
+        if screen.min_count is None:
+            return df
+        min_count = screen.min_count
+        return (
+            df.groupby(KEYS)
+            .agg({"close_ratio": "count"})
+            .reset_index()
+            .rename(columns={"close_ratio": "n_double"})
+            .query("n_double>=@min_count")
+            .drop(columns="n_double")
+        )
+
+
+# The columnar backends run on the frame DataFilters already loaded (after the BSE
+# reconciliation and the as-of cut), so ingest stays in one place. They mirror pandas
+# semantics where SQL/Polars differ by default: groups with a missing key are dropped,
+# sums skip missing values, the period close is the last row's close even if missing, and
+# x/0 is +-inf while 0/0 is missing (NaN would compare greater than any threshold).
+class ColumnarBackend(object):
+    def __init__(self, data_filter):
+        self.data_filter = data_filter
+        self.grouping_vars = data_filter.PERIOD_GROUPING
+
+    def pandas_dtypes(self, columns):
+        # what PandasBackend returns: keys and period columns keep their df_all dtypes,
+        # volume keeps the dtype of its sum and everything else is float, including the
+        # lags that shift pads with NaN
+        df_all = self.data_filter.df_all
+        float_columns = set(RATIO_COLUMNS) - {"volume"}
+        return {
+            c: "float64" if c in float_columns else df_all[c].dtype for c in columns
+        }
+
+    def finish(self, df, screen):
+        if screen.min_count is None:
+            df = df.loc[:, self.grouping_vars[screen.period][0] + RATIO_COLUMNS]
+        df = df.astype(self.pandas_dtypes(df.columns))
+        # groupby infers the dtype of object key columns (str under pandas 3), so do the
+        # same to keep merges against pandas frames and the parity check exact
+        return df.infer_objects().reset_index(drop=True)
+
+
+class DuckDBBackend(ColumnarBackend):
+    name = "duckdb"
+
+    def __init__(self, data_filter):
+        import duckdb
+
+        super().__init__(data_filter)
+        self.con = duckdb.connect()
+        # pandas NaN arrives as NULL, which is what the aggregates below rely on
+        self.con.register("prices", data_filter.df_all)
+        # SUM over BIGINT gives HUGEINT, which comes back as float; keep volume integral
+        volume_kind = data_filter.df_all.volume.dtype.kind
+        self.volume_type = "BIGINT" if volume_kind in "iu" else "DOUBLE"
+        self.con.execute(
+            """
+            CREATE MACRO ratio(a, b) AS CASE
+                WHEN b = 0 THEN CASE
+                    WHEN a > 0 THEN 'inf'::DOUBLE
+                    WHEN a < 0 THEN '-inf'::DOUBLE
+                END
+                ELSE a / b
+            END
+            """
+        )
+
+    def run(self, screen):
+        period = screen.period
+        keys = ", ".join(KEYS)
+        params = {"start": screen.start.to_pydatetime()}
+        conditions = ""
+        for i, (column, threshold) in enumerate(screen.thresholds.items()):
+            params[f"t{i}"] = float(threshold)
+            conditions += f" AND {column} > $t{i}"
+        query = f"""
+            WITH rollup AS (
+                SELECT {keys}, year, {period},
+                    COALESCE(SUM(close * volume), 0) AS value,
+                    CAST(COALESCE(SUM(volume), 0) AS {self.volume_type}) AS volume,
+                    arg_max_null(close, date) AS close
+                FROM prices
+                WHERE date >= $start
+                    AND exchange IS NOT NULL AND symbol IS NOT NULL AND isin IS NOT NULL
+                GROUP BY {keys}, year, {period}
+            ), lagged AS (
+                SELECT *,
+                    LAG(value) OVER w AS value_lag,
+                    LAG(volume) OVER w AS volume_lag,
+                    LAG(close) OVER w AS close_lag
+                FROM rollup
+                WINDOW w AS (PARTITION BY {keys} ORDER BY year, {period})
+            ), ratios AS (
+                SELECT *,
+                    ratio(value, value_lag) AS value_ratio,
+                    ratio(volume, volume_lag) AS volume_ratio,
+                    ratio(close, close_lag) AS close_ratio
+                FROM lagged
+            )
+            SELECT * FROM ratios
+            WHERE value_lag IS NOT NULL{conditions}
+        """
+        if screen.min_count is None:
+            query += f" ORDER BY {', '.join(self.grouping_vars[period][0])}"
+        else:
+            query = f"""
+                SELECT {keys} FROM ({query})
+                GROUP BY {keys}
+                HAVING COUNT(close_ratio) >= {int(screen.min_count)}
+                ORDER BY {keys}
+            """
+        df = self.con.execute(query, params).df()
+        return self.finish(df, screen)
+
+
+class PolarsBackend(ColumnarBackend):
+    name = "polars"
+
+    def __init__(self, data_filter):
+        import polars as pl
+
+        super().__init__(data_filter)
+        self.pl = pl
+        self.frame = self.from_pandas(data_filter.df_all).lazy()
+
+    def from_pandas(self, df):
+        # pl.from_pandas needs pyarrow for the nullable string columns, so those are
+        # handed over as python objects; numpy columns convert directly with NaN as null.
+        pl = self.pl
+        columns = dict()
+        for name in ["date", "year", "month", "quarter", "close", "volume"] + KEYS:
+            col = df[name]
+            if col.dtype.kind in "fiM":
+                columns[name] = pl.Series(name, col.to_numpy(), nan_to_null=True)
+            else:
+                columns[name] = pl.Series(
+                    name, col.astype(object).where(col.notna(), None).tolist(), pl.String
+                )
+        return pl.DataFrame(columns)
+
+    def ratio(self, a, b):
+        pl = self.pl
+        return (
+            pl.when(pl.col(b) == 0)
+            .then(
+                pl.when(pl.col(a) > 0)
+                .then(float("inf"))
+                .when(pl.col(a) < 0)
+                .then(float("-inf"))
+            )
+            .otherwise(pl.col(a) / pl.col(b))
+        )
+
+    def run(self, screen):
+        pl = self.pl
+        grouping_vars = self.grouping_vars[screen.period][0]
+        condition = pl.col("value_lag").is_not_null()
+        for column, threshold in screen.thresholds.items():
+            condition &= pl.col(column) > threshold
+
+        lf = (
+            self.frame.filter(pl.col("date") >= screen.start.to_pydatetime())
+            .drop_nulls(KEYS)
+            .group_by(KEYS + ["year", screen.period])
+            .agg(
+                (pl.col("close") * pl.col("volume")).sum().alias("value"),
+                pl.col("volume").sum(),
+                pl.col("close").sort_by("date").last(),
+            )
+            .sort(grouping_vars)
+            .with_columns(
+                pl.col(c).shift(1).over(KEYS).alias(f"{c}_lag")
+                for c in ["value", "volume", "close"]
+            )
+            .with_columns(
+                self.ratio(c, f"{c}_lag").alias(f"{c}_ratio")
+                for c in ["value", "volume", "close"]
+            )
+            .filter(condition)
+        )
+        if screen.min_count is not None:
+            lf = (
+                lf.group_by(KEYS)
+                .agg(pl.col("close_ratio").count().alias("n_double"))
+                .filter(pl.col("n_double") >= screen.min_count)
+                .select(KEYS)
+                .sort(KEYS)
+            )
+        df = lf.collect()
+        # DataFrame.to_pandas goes through pyarrow, so build the frame column by column
+        df = pd.DataFrame(
+            {
+                name: df[name].to_list()
+                if df[name].dtype == pl.String
+                else df[name].to_numpy()
+                for name in df.columns
+            }
+        )
+        return self.finish(df, screen)
+
+
+BACKENDS = {
+    "pandas": PandasBackend,
+    "duckdb": DuckDBBackend,
+    "polars": PolarsBackend,
+}
+
+
+def make_backend(name, data_filter):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend {name}, choose from {', '.join(BACKENDS)}")
+    try:
+        return BACKENDS[name](data_filter)
+    except ImportError as err:
+        raise ImportError(
+            f"The {name} backend needs the {name} package: pip install {name}"
+        ) from err
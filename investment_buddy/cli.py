@@ -0,0 +1,197 @@
+import argparse
+import logging
+
+from investment_buddy.config import set_data_root
+
+# Each stage imports its own module inside the handler so that a download-only or
+# screen-only run never loads the scraping dependencies, and vice versa.
+
+
+def parse_date(date_str):
+    import pendulum
+
+    return pendulum.from_format(date_str, "YYYYMMDD") if date_str else pendulum.today()
+
+
+def download(args):
+    from investment_buddy.downloader import BseDownloader, NseDownloader
+
+    downloaders = {"nse": NseDownloader, "bse": BseDownloader}
+    exchanges = list(downloaders) if args.exchange == "all" else [args.exchange]
+    for exchange in exchanges:
+        downloaders[exchange]().update_data(prune_weeks=args.prune_weeks)
+
+
+def screen(args):
+    from investment_buddy.filterer import DataFilters
+
+    data_filter = DataFilters(parse_date(args.as_of), backend=args.backend)
+    data_filter.apply_all_filters()
+
+
+def scrape(args):
+    import pandas as pd
+
+    from investment_buddy.config import data_path
+    from investment_buddy.scraper import scrape_metrics
+
+    df_filtered = pd.read_excel(data_path("filtered", f"{args.date_str}.xlsx"))
+    scrape_metrics(df_filtered, args.date_str, resume=not args.no_resume)
+
+
+def report(args):
+    import pandas as pd
+
+    from investment_buddy.config import data_path
+    from investment_buddy.scraper import write_journal_report
+
+    df_filtered = pd.read_excel(data_path("filtered", f"{args.date_str}.xlsx"))
+    write_journal_report(df_filtered, args.date_str)
+
+
+def run(args):
+    from investment_buddy.pipeline import Pipeline
+
+    Pipeline(
+        parse_date(args.as_of),
+        prune_weeks=args.prune_weeks,
+        scrape_workers=args.scrape_workers,
+        resume=not args.no_resume,
+        backend=args.backend,
+    ).run()
+
+
+def serve(args):
+    from investment_buddy.service import serve
+
+    serve(
+        args.host,
+        args.port,
+        refresh_interval=args.refresh_interval,
+        backend=args.backend,
+    )
+
+
+def replay(args):
+    import time
+
+    from investment_buddy.replay import ReplayServer
+
+    server = ReplayServer(
+        args.capture_dir,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        not_found_rate=args.not_found_rate,
+        missing_dates=args.missing_dates,
+        max_rps=args.max_rps,
+        timeout_rate=args.timeout_rate,
+        record=args.record,
+    )
+    with server:
+        for host in ["nsearchives.nseindia.com", "www.bseindia.com", "www.moneycontrol.com"]:
+            print(f"{host} -> {server.url_for(host)}")
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            pass
+
+
+def add_backend_argument(parser):
+    parser.add_argument(
+        "--backend",
+        choices=["pandas", "duckdb", "polars"],
+        default="pandas",
+        help="engine for the ratio screens; duckdb and polars must be installed",
+    )
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(prog="investment_buddy")
+    parser.add_argument(
+        "--data-root", help="directory holding the data files (default: ./data)"
+    )
+    parser.add_argument("--log-level", default="INFO")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    download_parser = subparsers.add_parser("download", help="update bhavcopy files")
+    download_parser.add_argument(
+        "--exchange", choices=["nse", "bse", "all"], default="all"
+    )
+    download_parser.add_argument("--prune-weeks", type=int, default=80)
+    download_parser.set_defaults(func=download)
+
+    screen_parser = subparsers.add_parser("screen", help="run the screens")
+    screen_parser.add_argument("--as-of", help="YYYYMMDD, defaults to today")
+    add_backend_argument(screen_parser)
+    screen_parser.set_defaults(func=screen)
+
+    scrape_parser = subparsers.add_parser(
+        "scrape", help="scrape metrics for a screened day and write its report"
+    )
+    scrape_parser.add_argument("date_str", help="YYYYMMDD of data/filtered/<date>.xlsx")
+    scrape_parser.add_argument(
+        "--no-resume", action="store_true", help="discard the journal and start over"
+    )
+    scrape_parser.set_defaults(func=scrape)
+
+    report_parser = subparsers.add_parser(
+        "report", help="write the report for a screened day from its run journal"
+    )
+    report_parser.add_argument("date_str", help="YYYYMMDD of data/filtered/<date>.xlsx")
+    report_parser.set_defaults(func=report)
+
+    run_parser = subparsers.add_parser("run", help="run the full pipeline")
+    run_parser.add_argument("--as-of", help="YYYYMMDD, defaults to today")
+    run_parser.add_argument("--prune-weeks", type=int, default=80)
+    run_parser.add_argument("--scrape-workers", type=int, default=8)
+    run_parser.add_argument(
+        "--no-resume", action="store_true", help="discard the journal and start over"
+    )
+    add_backend_argument(run_parser)
+    run_parser.set_defaults(func=run)
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="keep price data in memory and answer screen queries over HTTP"
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument(
+        "--refresh-interval",
+        type=int,
+        default=300,
+        help="seconds between checks for new price files, 0 to disable",
+    )
+    add_backend_argument(serve_parser)
+    serve_parser.set_defaults(func=serve)
+
+    replay_parser = subparsers.add_parser(
+        "replay", help="serve recorded exchange and Moneycontrol traffic locally"
+    )
+    replay_parser.add_argument("capture_dir")
+    replay_parser.add_argument("--host", default="127.0.0.1")
+    replay_parser.add_argument("--port", type=int, default=8766)
+    replay_parser.add_argument("--latency", type=float, default=0.0)
+    replay_parser.add_argument("--jitter", type=float, default=0.0)
+    replay_parser.add_argument("--not-found-rate", type=float, default=0.0)
+    replay_parser.add_argument(
+        "--missing-dates", nargs="*", default=[], help="YYYYMMDD days to answer 404"
+    )
+    replay_parser.add_argument("--max-rps", type=float, default=None)
+    replay_parser.add_argument("--timeout-rate", type=float, default=0.0)
+    replay_parser.add_argument(
+        "--record", action="store_true", help="fetch and save misses from the real hosts"
+    )
+    replay_parser.set_defaults(func=replay)
+
+    return parser
+
+
+def main(argv=None):
+    args = make_parser().parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper())
+    if args.data_root:
+        set_data_root(args.data_root)
+    args.func(args)
@@ -0,0 +1,57 @@
+import os
+from pathlib import Path
+from typing import Union
+
+DATA_ROOT_ENV = "INVESTMENT_BUDDY_DATA"
+
+_data_root = None
+
+
+def set_data_root(path: Union[str, Path, None]):
+    global _data_root
+    _data_root = Path(path) if path is not None else None
+
+
+def data_root() -> Path:
+    if _data_root is not None:
+        return _data_root
+    return Path(os.environ.get(DATA_ROOT_ENV, "data"))
+
+
+def data_path(*parts) -> Path:
+    return data_root().joinpath(*parts)
+
+
+# Upstream hosts can be pointed elsewhere, e.g. at a replay server (see
+# investment_buddy.replay), through set_base_url or INVESTMENT_BUDDY_<NAME>_URL.
+DEFAULT_BASE_URLS = {
+    "nse": "https://nsearchives.nseindia.com",
+    "bse": "https://www.bseindia.com",
+    "moneycontrol": "https://www.moneycontrol.com",
+}
+
+_base_urls = dict()
+
+
+def set_base_url(name: str, url: Union[str, None]):
+    if url is None:
+        _base_urls.pop(name, None)
+    else:
+        _base_urls[name] = url.rstrip("/")
+
+
+def get_base_url(name: str) -> str:
+    if name in _base_urls:
+        return _base_urls[name]
+    return os.environ.get(
+        f"INVESTMENT_BUDDY_{name.upper()}_URL", DEFAULT_BASE_URLS[name]
+    ).rstrip("/")
+
+
+def rewrite_url(url: str) -> str:
+    # Moneycontrol urls come from company_info.csv and from links on the pages
+    # themselves, so they are rewritten at request time rather than built from a base.
+    for name, default in DEFAULT_BASE_URLS.items():
+        if url.startswith(default):
+            return get_base_url(name) + url[len(default) :]
+    return url
@@ -0,0 +1,192 @@
+import json
+import logging
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+
+from investment_buddy.config import data_path, rewrite_url
+from investment_buddy.journal import truncate_partial_line
+
+logger = logging.getLogger(__name__)
+
+MC_INDEX_URL = "https://www.moneycontrol.com/india/stockpricequote/"
+INDEX_LETTERS = [""] + [chr(i) for i in range(ord("A"), ord("Z") + 1)] + ["Others"]
+
+
+def scrape_index_page(letter: str) -> List[Tuple[str, str]]:
+    resp = requests.get(rewrite_url(f"{MC_INDEX_URL}{letter}"))
+    home = BeautifulSoup(resp.content, features="lxml")
+    return [
+        (element.text, element.attrs["href"])
+        for element in home.find_all(class_="bl_12")
+    ]
+
+
+# Returns None when the page could not be fetched, so that the company is left out of the
+# checkpoint and retried; a missing page or one without company details counts as done.
+def scrape_company_details(page_name: str, page_url: str) -> Optional[dict]:
+    company_info = {"name": page_name, "url": page_url}
+
+    try:
+        resp = requests.get(rewrite_url(page_url))
+        if resp.status_code == 404:
+            return company_info
+        resp.raise_for_status()
+    except requests.RequestException as err:
+        logger.warning(f"Failed fetching {page_name}, will retry: {err}")
+        return None
+
+    try:
+        page_soup = BeautifulSoup(resp.content, features="lxml")
+
+        comdetl_elements = (
+            page_soup.find(id="company_info")
+            .find_all(class_="comdetl")[-1]
+            .find_all("li")
+        )
+        for element in comdetl_elements:
+            key = element.find("span").text.strip(":")
+            value = element.find("p").text
+            company_info[key] = value
+        return company_info
+    except Exception:
+        return company_info
+
+
+def dedupe_links(links: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    # dicts keep insertion order, so the first url seen for a name wins just like
+    # the old list scan, but in linear time.
+    unique = dict()
+    for name, url in links:
+        unique.setdefault(name, url)
+    return list(unique.items())
+
+
+# Crawls the Moneycontrol company index on a local thread or process pool. `starmap`
+# mirrors the task interface of the Modal function in modal_trial.py. Every company is
+# appended to a checkpoint file as soon as it is scraped so an interrupted crawl resumes
+# from there; the checkpoint is removed once the results are merged into the index.
+class CompanyIndexCrawler(object):
+    def __init__(
+        self,
+        executor: str = "thread",
+        max_workers: int = None,
+        index_path: str = None,
+        links_path: str = None,
+        checkpoint_path: str = None,
+    ):
+        assert executor in ("thread", "process"), "executor must be thread or process"
+        self.executor = executor
+        self.max_workers = max_workers or (os.cpu_count() or 1) * (
+            8 if executor == "thread" else 1
+        )
+        self.index_path = Path(index_path or data_path("company_info.csv"))
+        self.links_path = Path(links_path or data_path("all_companies.pkl"))
+        self.checkpoint_path = Path(
+            checkpoint_path or data_path("company_info_checkpoint.jsonl")
+        )
+
+    def make_executor(self):
+        if self.executor == "process":
+            return ProcessPoolExecutor(max_workers=self.max_workers)
+        return ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def starmap(self, func, tasks: Iterable[tuple]):
+        tasks = list(tasks)
+        if not tasks:
+            return
+        with self.make_executor() as executor:
+            yield from executor.map(func, *zip(*tasks))
+
+    def scrape_index(self) -> List[Tuple[str, str]]:
+        all_links = [
+            link
+            for page in self.starmap(scrape_index_page, [(l,) for l in INDEX_LETTERS])
+            for link in page
+        ]
+        links = dedupe_links(all_links)
+        logger.info(f"Found {len(links)} unique companies in {len(all_links)} links")
+        with open(self.links_path, "wb") as f:
+            pickle.dump(links, f)
+        return links
+
+    def load_links(self) -> List[Tuple[str, str]]:
+        with open(self.links_path, "rb") as f:
+            return pickle.load(f)
+
+    def load_index(self) -> pd.DataFrame:
+        if self.index_path.exists():
+            return pd.read_csv(self.index_path).rename(columns=str.lower)
+        return pd.DataFrame(columns=["name", "url"])
+
+    def load_checkpoint(self) -> List[dict]:
+        if not self.checkpoint_path.exists():
+            return []
+        records = []
+        with open(self.checkpoint_path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # last line may be partial if the crawl was killed mid-write
+                    continue
+        return records
+
+    def pending_links(self, links, df_index, checkpointed) -> List[Tuple[str, str]]:
+        done = set(df_index.name.tolist())
+        done.update(record["name"] for record in checkpointed)
+        return [(name, url) for name, url in links if name not in done]
+
+    def crawl(self, refresh_index: bool = False) -> pd.DataFrame:
+        links = self.scrape_index() if refresh_index else self.load_links()
+        df_old_scraped = self.load_index()
+        checkpointed = self.load_checkpoint()
+        pending = self.pending_links(links, df_old_scraped, checkpointed)
+        logger.info(
+            f"{len(pending)} of {len(links)} companies left to scrape "
+            f"({len(checkpointed)} resumed from checkpoint)"
+        )
+
+        failed = 0
+        truncate_partial_line(self.checkpoint_path)
+        with open(self.checkpoint_path, "a") as f:
+            for i, company_info in enumerate(
+                self.starmap(scrape_company_details, pending), 1
+            ):
+                if company_info is None:
+                    failed += 1
+                    continue
+                f.write(json.dumps(company_info) + "\n")
+                f.flush()
+                checkpointed.append(company_info)
+                if i % 100 == 0:
+                    logger.info(f"Scraped {i} of {len(pending)} companies")
+        if failed:
+            logger.warning(f"{failed} companies could not be fetched, rerun to retry them")
+
+        df_newly_scraped = pd.DataFrame(checkpointed).rename(columns=str.lower)
+        if "isin" in df_newly_scraped:
+            df_newly_scraped = df_newly_scraped.query("isin.notna()", engine="python")
+        else:
+            df_newly_scraped = df_newly_scraped.iloc[0:0]
+        logger.info(f"{len(df_newly_scraped)} links newly scraped")
+
+        df_company_info = (
+            pd.concat([df_old_scraped, df_newly_scraped])
+            .sort_values("name")
+            .drop_duplicates("name")
+        )
+        logger.info(
+            f"{len(df_company_info)} out of {len(links)} links scraped in total"
+        )
+        df_company_info.to_csv(self.index_path, index=False)
+        with open(self.links_path.with_name("all_companies_list.pkl"), "wb") as f:
+            pickle.dump(checkpointed, f)
+        os.remove(self.checkpoint_path)
+        return df_company_info
@@ -7,21 +7,28 @@ import zipfile
 import tempfile
 import os
 import pandas as pd
-from concurrent.futures import ProcessPoolExecutor
 import logging
 from requests.exceptions import HTTPError, ReadTimeout, Timeout
 import glob
 import numpy as np
 
+from investment_buddy.config import data_path, get_base_url
+
 logger = logging.getLogger(__name__)
 
 
 class StockDownloader(object):
-    def __init__(self, timeout: int = 2):
+    def __init__(self, timeout: int = 2, base_url: str = None, bootstrap: bool = True):
         self.timeout = timeout
-        if len(glob.glob(f"{self.download_path}/*.csv")) == 0:
+        self.base_url = (base_url or get_base_url(self.exchange.lower())).rstrip("/")
+        self.download_path.mkdir(parents=True, exist_ok=True)
+        if bootstrap and len(glob.glob(f"{self.download_path}/*.csv")) == 0:
             self.download_past_two_years()
 
+    @property
+    def download_path(self) -> Path:
+        return data_path(self.exchange.lower())
+
     def download_data_for_date(self, date: Date, replace=False):
         download_url = self.make_url_func(date)
         file_name = date.format("YYYYMMDD") + ".csv"
@@ -173,26 +180,24 @@ class StockDownloader(object):
 
 
 class NseDownloader(StockDownloader):
-    download_path = Path("data/nse")
     exchange = "NSE"
     exclude_days = []
 
     def make_url_func(self, date: Date):
         date_str = date.format("YYYYMMDD").upper()
-        return f"https://nsearchives.nseindia.com/content/cm/BhavCopy_NSE_CM_0_0_0_{date_str}_F_0000.csv.zip"
+        return f"{self.base_url}/content/cm/BhavCopy_NSE_CM_0_0_0_{date_str}_F_0000.csv.zip"
 
     def reformat(self, df):
         return df.rename(columns={"TOTTRDQTY": "volume"}).assign(exchange=self.exchange)
 
 
 class BseDownloader(StockDownloader):
-    download_path = Path("data/bse")
     exchange = "BSE"
     exclude_days = ["20211229"]
 
     def make_url_func(self, date: Date):
         date_str = date.format("YYYYMMDD").upper()
-        return f"https://www.bseindia.com/download/BhavCopy/Equity/BhavCopy_BSE_CM_0_0_0_{date_str}_F_0000.CSV"
+        return f"{self.base_url}/download/BhavCopy/Equity/BhavCopy_BSE_CM_0_0_0_{date_str}_F_0000.CSV"
 
     def reformat(self, df):
         return df.rename(
@@ -3,42 +3,97 @@ from typing import Union
 import pandas as pd
 import logging
 import glob
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from investment_buddy.backends import RatioScreen, make_backend
+from investment_buddy.config import data_path
+from investment_buddy.sweep import sweep_count_screen, sweep_ratio_screen
 
 logger = logging.getLogger(__name__)
 
 
+def price_files():
+    return glob.glob(f"{data_path('nse')}/*.csv") + glob.glob(f"{data_path('bse')}/*.csv")
+
+
+# Daily files are written by StockDownloader with a fixed layout. Workers only parse the
+# files; the conversions run once on the concatenated frame, since doing them per file
+# (or passing dtypes to read_csv) costs more in per-call overhead than it saves. The
+# date format is given up front as it never changes.
+PRICE_DATE_FORMAT = "%Y-%m-%d"
+
+
+def read_price_file(path):
+    return pd.read_csv(path)
+
+
+def prepare_prices(df):
+    return df.assign(
+        date=lambda df: pd.to_datetime(df.date, format=PRICE_DATE_FORMAT),
+        quarter=lambda df: df.date.dt.quarter,
+        alt_id=lambda df: df.alt_id.astype("Int64").astype("string"),
+        isin=lambda df: df["isin"].astype("string"),
+    )
+
+
+def read_price_files(paths, max_workers=None):
+    # read_csv releases the GIL while parsing, so threads pay off with spare cores; with
+    # a single core the pool is pure overhead and files are read in turn.
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1:
+        return prepare_prices(pd.concat(map(read_price_file, paths)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return prepare_prices(pd.concat(executor.map(read_price_file, paths)))
+
+
+def reconcile_bse(df_all_org):
+    # to address change in format of data files after July 8, 2024.
+    df_nse = df_all_org.query("exchange=='NSE'")
+    df_bse = df_all_org.query("exchange=='BSE'")
+    df_bse_new = df_bse.query("alt_id.notna()")
+    df_replace_dict = df_bse_new.query("date==date.max()")[
+        ["symbol", "isin", "alt_id"]
+    ].drop_duplicates()
+    df_bse_old = (
+        df_bse.query("alt_id.isna()")
+        .drop(columns=["symbol", "alt_id"])
+        .rename(columns={"isin": "alt_id"})
+    )
+    df_bse_old = df_bse_old.merge(df_replace_dict, how="left", on="alt_id")
+    df_all = pd.concat([df_nse, df_bse_new, df_bse_old])
+    assert len(df_all) == len(df_all_org)
+    return df_all
+
+
 class DataFilters(object):
-    def __init__(self, as_of_date):
-        df_all_org = pd.concat(
-            map(pd.read_csv, glob.glob("data/nse/*.csv") + glob.glob("data/bse/*.csv"))
-        ).assign(
-            date=lambda df: pd.to_datetime(df.date),
-            quarter=lambda df: df.date.dt.quarter,
-            alt_id=lambda df: df.alt_id.astype("Int64").astype("string"),
-            isin=lambda df: df["isin"].astype("string"),
-        )
+    PERIOD_GROUPING = {
+        "month": (["exchange", "symbol", "isin", "year", "month"], ["day"]),
+        "quarter": (["symbol", "isin", "exchange", "year", "quarter"], ["month", "day"]),
+    }
 
-        # to address change in format of data files after July 8, 2024.
-        df_nse = df_all_org.query("exchange=='NSE'")
-        df_bse = df_all_org.query("exchange=='BSE'")
-        df_bse_new = df_bse.query("alt_id.notna()")
-        df_replace_dict = df_bse_new.query("date==date.max()")[
-            ["symbol", "isin", "alt_id"]
-        ].drop_duplicates()
-        df_bse_old = (
-            df_bse.query("alt_id.isna()")
-            .drop(columns=["symbol", "alt_id"])
-            .rename(columns={"isin": "alt_id"})
-        )
-        df_bse_old = df_bse_old.merge(df_replace_dict, how="left", on="alt_id")
-        df_all = pd.concat([df_nse, df_bse_new, df_bse_old])
-        assert len(df_all) == len(df_all_org)
+    def __init__(self, as_of_date, df_all=None, backend="pandas", ratio_cache=None):
+        # df_all can be handed in by a caller that keeps the price data resident
+        # (see investment_buddy.service) to skip reading every file again. ratio_cache
+        # is any mapping with .get() that keeps period_ratios tables across instances.
+        if df_all is None:
+            df_all = reconcile_bse(read_price_files(price_files()))
 
         self.as_of_date = pd.to_datetime(as_of_date.naive())
         max_date = df_all.date.max()
         self.filter_date = max_date if max_date < self.as_of_date else self.as_of_date
-        self.df_all = df_all.query("date <= @self.filter_date")
+        if self.filter_date >= max_date:
+            self.df_all = df_all
+        elif df_all.date.is_monotonic_increasing:
+            # a date-sorted frame is cut by position, which slices instead of copying
+            end = df_all.date.searchsorted(self.filter_date, side="right")
+            self.df_all = df_all.iloc[:end]
+        else:
+            self.df_all = df_all.query("date <= @self.filter_date")
+        self.ratio_cache = ratio_cache
         self.date_str = f"{self.filter_date.year}{self.filter_date.month:02}{self.filter_date.day:02}"
+        # executes the ratio screens, see investment_buddy.backends
+        self.backend = make_backend(backend, self)
         logger.info(
             f"Filtering as of {self.date_str} (Either the date provided or the latest one available). "
         )
@@ -58,9 +113,9 @@ class DataFilters(object):
             for dt in month_period.range("days")
         ]
         prev_days = [
-            f"data/filtered/{d}.xlsx"
+            data_path("filtered", f"{d}.xlsx")
             for d in date_strs
-            if len(glob.glob(f"data/filtered/{d}.xlsx"))
+            if data_path("filtered", f"{d}.xlsx").exists()
         ]
         self.df_prev = (
             pd.concat(map(pd.read_excel, prev_days)).assign(
@@ -70,25 +125,31 @@ class DataFilters(object):
             else None
         )
 
-    def apply_all_filters(self):
+    def iter_screens(self):
         self.get_prev_data()
         # self.apply_300p_month_filter()
+        # yield "300% value over prior month", self.df_300p_val_month
         self.apply_200p_quarter_filter()
+        yield "200% value over prior quarter", self.df_200p_val_quarter
         # self.apply_200p_thrice_12mos()
+        # yield "200% thrice in 12 months", self.df_200p_val_thrice
         self.apply_200p_twice_6mos()
+        yield "200% twice in 6 months", self.df_200p_val_twice
         # self.apply_52week_high_filter()
+        # yield "52 week high", self.df_52_week_highs
+
+    @staticmethod
+    def exclude_symbols(df):
+        return (
+            df.query("~symbol.str.endswith('ETF')")
+            .query("~symbol.str.startswith('ADANI')")
+            .query("~symbol.str.startswith('RELIANCE')")
+            .query("~symbol.str.startswith('KOTHARI')")
+        )
+
+    def combine_screens(self, screens, export=True):
         self.df_all_filtered = (
-            pd.concat(
-                [
-                    # self.df_300p_val_month.assign(filter="300% value over prior month"),
-                    self.df_200p_val_quarter.assign(
-                        filter="200% value over prior quarter"
-                    ),
-                    # self.df_52_week_highs.assign(filter="52 week high"),
-                    # self.df_200p_val_thrice.assign(filter="200% thrice in 12 months"),
-                    self.df_200p_val_twice.assign(filter="200% twice in 6 months"),
-                ]
-            )
+            pd.concat([df.assign(filter=name) for name, df in screens])
             .groupby(["exchange", "symbol", "isin"])
             .agg({"filter": lambda x: x.str.cat(sep=", ")})
             .reset_index()
@@ -99,38 +160,39 @@ class DataFilters(object):
             .last()
             .reset_index()
         )
-        self.df_all_filtered = (
-            self.df_all_filtered.query("~symbol.str.endswith('ETF)")
-            .query("~symbol.str.startswith('ADANI)")
-            .query("~symbol.str.startswith('RELIANCE)")
-            .query("~symbol.str.startswith('KOTHARI)")
-        )
+        self.df_all_filtered = self.exclude_symbols(self.df_all_filtered)
+        if not export:
+            return
 
-        self.df_all_filtered.to_excel(
-            f"data/filtered/{self.date_str}.xlsx", index=False
-        )
+        export_path = data_path("filtered", f"{self.date_str}.xlsx")
+        export_path.parent.mkdir(parents=True, exist_ok=True)
+        self.df_all_filtered.to_excel(export_path, index=False)
         logger.info(
-            f"Exported results to data/filtered/{self.date_str}.xlsx. There are {self.df_all_filtered.shape[0]} scripts to scrape."
+            f"Exported results to {export_path}. There are {self.df_all_filtered.shape[0]} scripts to scrape."
         )
 
-    def current_quarter_start(self, ref):
-        if ref.month < 4:
-            return pendulum.DateTime(ref.year, 1, 1)
-        elif ref.month < 7:
-            return pendulum.DateTime(ref.year, 4, 1)
-        elif ref.month < 10:
-            return pendulum.DateTime(ref.year, 7, 1)
-        return pendulum.DateTime(ref.year, 10, 1)
+    def apply_all_filters(self, export=True):
+        self.combine_screens(list(self.iter_screens()), export=export)
 
-    def apply_300p_month_filter(self):
-        prev_month_first = (self.filter_date - pd.DateOffset(months=1)).replace(day=1)
-        grouping_vars = ["exchange", "symbol", "isin", "year", "month"]
-        self.df_300p_val_month = (
-            self.df_all.query("date >= @prev_month_first")
+    def period_ratios(self, start, period, df=None):
+        if df is None and self.ratio_cache is not None:
+            key = (period, pd.Timestamp(start), self.filter_date)
+            df_ratios = self.ratio_cache.get(key)
+            if df_ratios is None:
+                df_ratios = self.period_ratios(start, period, df=self.df_all)
+                self.ratio_cache[key] = df_ratios
+            return df_ratios
+
+        grouping_vars, sort_vars = self.PERIOD_GROUPING[period]
+        df = self.df_all if df is None else df
+        return (
+            df.query("date >= @start")
             .assign(value=lambda df: df.close * df.volume)
-            .sort_values(grouping_vars + ["day"])
+            .sort_values(grouping_vars + sort_vars)
             .groupby(grouping_vars)
-            .agg({"value": sum, "volume": sum, "close": lambda x: x.iloc[-1]})
+            # "sum" skips missing closes; the builtin sum is only mapped to it before
+            # pandas 3 and would otherwise turn the whole period into NaN
+            .agg({"value": "sum", "volume": "sum", "close": lambda x: x.iloc[-1]})
             .reset_index()
             .sort_values(grouping_vars)
             .assign(
@@ -147,8 +209,31 @@ class DataFilters(object):
                 volume_ratio=lambda df: df.volume / df.volume_lag,
                 close_ratio=lambda df: df.close / df.close_lag,
             )
-            .query("value_lag.notna()", engine="python")
-            .query("value_ratio>3 & close_ratio>1 & value>2_000_000")
+        )
+
+    def current_quarter_start(self, ref):
+        if ref.month < 4:
+            return pendulum.DateTime(ref.year, 1, 1)
+        elif ref.month < 7:
+            return pendulum.DateTime(ref.year, 4, 1)
+        elif ref.month < 10:
+            return pendulum.DateTime(ref.year, 7, 1)
+        return pendulum.DateTime(ref.year, 10, 1)
+
+    def apply_300p_month_filter(
+        self, min_value_ratio=3, min_close_ratio=1, min_value=2_000_000
+    ):
+        prev_month_first = (self.filter_date - pd.DateOffset(months=1)).replace(day=1)
+        self.df_300p_val_month = self.backend.run(
+            RatioScreen(
+                "month",
+                prev_month_first,
+                dict(
+                    value_ratio=min_value_ratio,
+                    close_ratio=min_close_ratio,
+                    value=min_value,
+                ),
+            )
         )
         if self.df_prev is not None:
             self.df_300p_val_month = (
@@ -174,35 +259,22 @@ class DataFilters(object):
             return pendulum.DateTime(ref.year, 4, 1)
         return pendulum.DateTime(ref.year, 7, 1)
 
-    def apply_200p_quarter_filter(self):
+    def apply_200p_quarter_filter(
+        self, min_value_ratio=2, min_close_ratio=1, min_value=6_000_000
+    ):
         prev_quarter_first = pd.to_datetime(
             self.previous_quarter_start(self.filter_date)
         )
-        grouping_vars = ["symbol", "isin", "exchange", "year", "quarter"]
-        self.df_200p_val_quarter = (
-            self.df_all.query("date >= @prev_quarter_first")
-            .assign(value=lambda df: df.close * df.volume)
-            .sort_values(grouping_vars + ["month", "day"])
-            .groupby(grouping_vars)
-            .agg({"value": sum, "volume": sum, "close": lambda x: x.iloc[-1]})
-            .reset_index()
-            .sort_values(grouping_vars)
-            .assign(
-                value_lag=lambda df: df.groupby(["exchange", "symbol", "isin"])[
-                    "value"
-                ].shift(1),
-                volume_lag=lambda df: df.groupby(["exchange", "symbol", "isin"])[
-                    "volume"
-                ].shift(1),
-                close_lag=lambda df: df.groupby(["exchange", "symbol", "isin"])[
-                    "close"
-                ].shift(1),
-                value_ratio=lambda df: df.value / df.value_lag,
-                volume_ratio=lambda df: df.volume / df.volume_lag,
-                close_ratio=lambda df: df.close / df.close_lag,
+        self.df_200p_val_quarter = self.backend.run(
+            RatioScreen(
+                "quarter",
+                prev_quarter_first,
+                dict(
+                    value_ratio=min_value_ratio,
+                    close_ratio=min_close_ratio,
+                    value=min_value,
+                ),
             )
-            .query("value_lag.notna()", engine="python")
-            .query("value_ratio>2 & close_ratio>1 & value>6_000_000")
         )
         if self.df_prev is not None:
             self.df_200p_val_quarter = (
@@ -242,39 +314,17 @@ class DataFilters(object):
             .drop(columns="high_max")
         )
 
-    def apply_200p_thrice_12mos(self):
+    def apply_200p_thrice_12mos(
+        self, min_value_ratio=2, min_value=2_000_000, min_n_double=3
+    ):
         date_12mos_prior = (self.filter_date - pd.DateOffset(months=12)).replace(day=1)
-        grouping_vars = ["exchange", "symbol", "isin", "year", "month"]
-        df_200p_val_thrice_filter = (
-            self.df_all.query("date >= @date_12mos_prior")
-            .assign(value=lambda df: df.close * df.volume)
-            .sort_values(grouping_vars + ["day"])
-            .groupby(grouping_vars)
-            .agg({"value": sum, "volume": sum, "close": lambda x: x.iloc[-1]})
-            .reset_index()
-            .sort_values(grouping_vars)
-            .assign(
-                value_lag=lambda df: df.groupby(["exchange", "symbol", "isin"])[
-                    "value"
-                ].shift(1),
-                volume_lag=lambda df: df.groupby(["exchange", "symbol", "isin"])[
-                    "volume"
-                ].shift(1),
-                close_lag=lambda df: df.groupby(["exchange", "symbol", "isin"])[
-                    "close"
-                ].shift(1),
-                value_ratio=lambda df: df.value / df.value_lag,
-                volume_ratio=lambda df: df.volume / df.volume_lag,
-                close_ratio=lambda df: df.close / df.close_lag,
+        df_200p_val_thrice_filter = self.backend.run(
+            RatioScreen(
+                "month",
+                date_12mos_prior,
+                dict(value_ratio=min_value_ratio, value=min_value),  # close_ratio=1
+                min_count=min_n_double,
             )
-            .query("value_lag.notna()", engine="python")
-            .query("value_ratio>2 & value>2_000_000")  # & close_ratio>1
-            .groupby(["exchange", "symbol", "isin"])
-            .agg({"close_ratio": "count"})
-            .reset_index()
-            .rename(columns={"close_ratio": "n_double"})
-            .query("n_double>=3")
-            .drop(columns="n_double")
         )
         self.df_200p_val_thrice = self.df_all.query("date == @self.filter_date").merge(
             df_200p_val_thrice_filter, how="inner"
@@ -295,39 +345,17 @@ class DataFilters(object):
                 .drop(columns="already_exists")
             )
 
-    def apply_200p_twice_6mos(self):
+    def apply_200p_twice_6mos(
+        self, min_value_ratio=2, min_value=2_000_000, min_n_double=2
+    ):
         date_6mos_prior = (self.filter_date - pd.DateOffset(months=6)).replace(day=1)
-        grouping_vars = ["exchange", "symbol", "isin", "year", "month"]
-        df_200p_val_twice_filter = (
-            self.df_all.query("date >= @date_6mos_prior")
-            .assign(value=lambda df: df.close * df.volume)
-            .sort_values(grouping_vars + ["day"])
-            .groupby(grouping_vars)
-            .agg({"value": sum, "volume": sum, "close": lambda x: x.iloc[-1]})
-            .reset_index()
-            .sort_values(grouping_vars)
-            .assign(
-                value_lag=lambda df: df.groupby(["exchange", "symbol", "isin"])[
-                    "value"
-                ].shift(1),
-                volume_lag=lambda df: df.groupby(["exchange", "symbol", "isin"])[
-                    "volume"
-                ].shift(1),
-                close_lag=lambda df: df.groupby(["exchange", "symbol", "isin"])[
-                    "close"
-                ].shift(1),
-                value_ratio=lambda df: df.value / df.value_lag,
-                volume_ratio=lambda df: df.volume / df.volume_lag,
-                close_ratio=lambda df: df.close / df.close_lag,
+        df_200p_val_twice_filter = self.backend.run(
+            RatioScreen(
+                "month",
+                date_6mos_prior,
+                dict(value_ratio=min_value_ratio, value=min_value),  # close_ratio=1
+                min_count=min_n_double,
             )
-            .query("value_lag.notna()", engine="python")
-            .query("value_ratio>2 & value>2_000_000")  # & close_ratio>1
-            .groupby(["exchange", "symbol", "isin"])
-            .agg({"close_ratio": "count"})
-            .reset_index()
-            .rename(columns={"close_ratio": "n_double"})
-            .query("n_double>=2")
-            .drop(columns="n_double")
         )
         self.df_200p_val_twice = self.df_all.query("date == @self.filter_date").merge(
             df_200p_val_twice_filter, how="inner"
@@ -348,5 +376,45 @@ class DataFilters(object):
                 .drop(columns="already_exists")
             )
 
+    # Sweeps evaluate a grid of thresholds in one pass, e.g.
+    # sweep_200p_quarter_filter(min_value_ratio=[1.5, 2, 3], min_value=[2e6, 6e6]).
+    # Thresholds left out keep the screen's default. Unlike the apply_* methods they do
+    # not drop candidates already flagged on earlier days, so hit counts are comparable
+    # across settings.
+    def sweep_200p_quarter_filter(
+        self, min_value_ratio=2, min_close_ratio=1, min_value=6_000_000
+    ):
+        prev_quarter_first = pd.to_datetime(
+            self.previous_quarter_start(self.filter_date)
+        )
+        df_ratios = self.period_ratios(prev_quarter_first, "quarter").query(
+            "value_lag.notna()", engine="python"
+        )
+        return sweep_ratio_screen(
+            df_ratios,
+            dict(
+                min_value_ratio=min_value_ratio,
+                min_close_ratio=min_close_ratio,
+                min_value=min_value,
+            ),
+        )
+
+    def sweep_200p_twice_6mos(
+        self, min_value_ratio=2, min_value=2_000_000, min_n_double=2
+    ):
+        date_6mos_prior = (self.filter_date - pd.DateOffset(months=6)).replace(day=1)
+        df_ratios = self.period_ratios(date_6mos_prior, "month").query(
+            "value_lag.notna()", engine="python"
+        )
+        return sweep_count_screen(
+            df_ratios,
+            dict(
+                min_value_ratio=min_value_ratio,
+                min_value=min_value,
+                min_n_double=min_n_double,
+            ),
+            self.df_all.query("date == @self.filter_date"),
+        )
+
     def __repr__(self):
         return f"DateFilter({self.date_str})"
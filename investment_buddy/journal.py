@@ -0,0 +1,74 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from investment_buddy.config import data_path
+
+logger = logging.getLogger(__name__)
+
+
+def truncate_partial_line(path):
+    # A process killed mid-write leaves a last line without its newline. Cut it off so
+    # that the next append starts a fresh line instead of being glued onto the fragment,
+    # which would make load() drop the new record along with it.
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, "rb+") as f:
+        pos = f.seek(0, os.SEEK_END)
+        if pos == 0:
+            return
+        f.seek(pos - 1)
+        if f.read(1) == b"\n":
+            return
+        while pos > 0:
+            step = min(4096, pos)
+            pos = f.seek(pos - step)
+            newline = f.read(step).rfind(b"\n")
+            if newline >= 0:
+                f.truncate(pos + newline + 1)
+                return
+        f.truncate(0)
+
+
+# Append-only record of the props scraped for a run, one JSON line per company. Lines are
+# flushed as soon as a company is done so a crashed or interrupted run can resume without
+# repeating finished work.
+class RunJournal(object):
+    def __init__(self, date_str, path=None):
+        self.date_str = date_str
+        self.path = Path(path or data_path("journal", f"{date_str}.jsonl"))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+
+    def append(self, isin, symbol, props):
+        line = json.dumps({"isin": str(isin), "symbol": str(symbol), "props": props})
+        with self.lock:
+            truncate_partial_line(self.path)
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def load(self):
+        done = dict()
+        if not self.path.exists():
+            return done
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # last line may be partial if the run was killed mid-write
+                    continue
+                done[(record["isin"], record["symbol"])] = record["props"]
+        return done
+
+    def reset(self):
+        if self.path.exists():
+            os.remove(self.path)
+
+    def __repr__(self):
+        return f"RunJournal({self.path})"
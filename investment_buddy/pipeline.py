@@ -0,0 +1,130 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pendulum
+
+from investment_buddy.downloader import BseDownloader, NseDownloader
+from investment_buddy.filterer import DataFilters
+from investment_buddy.journal import RunJournal
+from investment_buddy.scraper import (
+    candidate_keys,
+    scrape_candidate,
+    write_journal_report,
+)
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+# Runs download -> screen -> scrape -> report with the stages overlapped. Both exchanges
+# update concurrently, and candidates are streamed to a pool of scraper threads through a
+# bounded queue as each screen finishes, so network-bound scraping runs while the
+# remaining screens are still being computed. Scraped props go to the run journal, so a
+# rerun for the same day resumes where the last one stopped.
+class Pipeline(object):
+    def __init__(
+        self,
+        as_of_date=None,
+        prune_weeks: int = 80,
+        scrape_workers: int = 8,
+        queue_size: int = 32,
+        resume: bool = True,
+        backend: str = "pandas",
+    ):
+        self.as_of_date = as_of_date or pendulum.today()
+        self.prune_weeks = prune_weeks
+        self.scrape_workers = scrape_workers
+        self.queue_size = queue_size
+        self.resume = resume
+        self.backend = backend
+        self.journal = None
+        self.worker_errors = []
+
+    def update_exchange(self, downloader_cls):
+        downloader_cls().update_data(prune_weeks=self.prune_weeks)
+
+    def update_exchanges(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # list() so that a failed download surfaces here instead of being swallowed
+            list(executor.map(self.update_exchange, [NseDownloader, BseDownloader]))
+
+    @staticmethod
+    def screen_keys(df):
+        # mirrors the de-duplication in DataFilters.combine_screens so that the symbol
+        # scraped for an isin is the one that ends up in the report.
+        df = (
+            df[["exchange", "symbol", "isin"]]
+            .sort_values(["isin", "exchange"])
+            .drop_duplicates("isin", keep="last")
+            .pipe(DataFilters.exclude_symbols)
+        )
+        return candidate_keys(df)
+
+    def screen(self, candidates: queue.Queue):
+        data_filter = DataFilters(self.as_of_date, backend=self.backend)
+        self.journal = RunJournal(data_filter.date_str)
+        if not self.resume:
+            self.journal.reset()
+        screens = []
+        submitted = set(self.journal.load())
+        for name, df in data_filter.iter_screens():
+            screens.append((name, df))
+            keys = [k for k in self.screen_keys(df) if k not in submitted]
+            logger.info(f"{name}: streaming {len(keys)} new candidates to scrapers")
+            for key in keys:
+                submitted.add(key)
+                # blocks while the scrapers are behind, bounding memory between stages
+                candidates.put(key)
+        data_filter.combine_screens(screens)
+        return data_filter
+
+    def scrape_worker(self, candidates: queue.Queue):
+        # a worker must keep draining the queue whatever happens, otherwise the bounded
+        # puts in screen() block forever; errors are re-raised by run() once all are done.
+        while True:
+            key = candidates.get()
+            if key is _DONE:
+                break
+            try:
+                self.scrape(*key)
+            except Exception as err:
+                logger.exception(f"Scraper failed for {key}: {err}")
+                self.worker_errors.append(err)
+
+    def scrape(self, isin, symbol):
+        props = scrape_candidate(isin, symbol)
+        if props is not None:
+            self.journal.append(isin, symbol, props)
+
+    def run(self):
+        self.update_exchanges()
+
+        candidates = queue.Queue(maxsize=self.queue_size)
+        workers = [
+            threading.Thread(target=self.scrape_worker, args=(candidates,), daemon=True)
+            for _ in range(self.scrape_workers)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            data_filter = self.screen(candidates)
+        finally:
+            for _ in workers:
+                candidates.put(_DONE)
+            for worker in workers:
+                worker.join()
+        if self.worker_errors:
+            raise RuntimeError(
+                f"{len(self.worker_errors)} scrapes failed, see the log; rerun to resume"
+            ) from self.worker_errors[0]
+
+        df_filtered = data_filter.df_all_filtered
+        done = self.journal.load()
+        for key in candidate_keys(df_filtered):
+            if key not in done:
+                self.scrape(*key)
+        write_journal_report(df_filtered, data_filter.date_str)
+        return data_filter
@@ -0,0 +1,163 @@
+import logging
+import mimetypes
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+
+from investment_buddy.config import DEFAULT_BASE_URLS, set_base_url
+
+logger = logging.getLogger(__name__)
+
+
+# Local stand-in for the exchange and Moneycontrol hosts. Captures live under
+# <capture_dir>/<host>/<path> and are served at http://<server>/<host>/<path>, so pointing
+# a base url at `server.url_for(host)` is enough to redirect a client. With record=True,
+# misses are fetched from the real host and saved, which is how captures are made.
+# Latency, random 404s, throttling and timeouts can be injected to exercise the fetch
+# paths under realistic conditions.
+class ReplayServer(object):
+    def __init__(
+        self,
+        capture_dir,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        not_found_rate: float = 0.0,
+        missing_dates=(),
+        max_rps: float = None,
+        timeout_rate: float = 0.0,
+        timeout_delay: float = 30.0,
+        record: bool = False,
+        seed: int = 0,
+    ):
+        self.capture_dir = Path(capture_dir)
+        self.latency, self.jitter = latency, jitter
+        self.not_found_rate = not_found_rate
+        self.missing_dates = set(missing_dates)
+        self.max_rps = max_rps
+        self.timeout_rate, self.timeout_delay = timeout_rate, timeout_delay
+        self.record = record
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_times = []
+        self.stats = dict(served=0, not_found=0, throttled=0, timed_out=0, recorded=0)
+
+        self.httpd = ThreadingHTTPServer((host, port), ReplayHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.replay = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, host):
+        return f"{self.url}/{host}"
+
+    def capture_path(self, host, path):
+        path = path.lstrip("/")
+        if not path or path.endswith("/"):
+            path += "index.html"
+        return self.capture_dir / host / path
+
+    def roll(self, rate):
+        with self.lock:
+            return rate > 0 and self.random.random() < rate
+
+    def throttled(self):
+        if not self.max_rps:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            self.request_times = [t for t in self.request_times if now - t < 1]
+            if len(self.request_times) >= self.max_rps:
+                return True
+            self.request_times.append(now)
+            return False
+
+    def count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def fetch_upstream(self, host, path, target):
+        r = requests.get(
+            f"https://{host}/{path.lstrip('/')}",
+            timeout=60,
+            headers={"User-Agent": "firefox"},
+        )
+        if r.status_code != 200:
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(r.content)
+        self.count("recorded")
+        return True
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        logger.info(f"Replaying {self.capture_dir} at {self.url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def use_for_all_hosts(self):
+        for name, default in DEFAULT_BASE_URLS.items():
+            set_base_url(name, self.url_for(urlparse(default).netloc))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def __repr__(self):
+        return f"ReplayServer({self.capture_dir}, {self.url})"
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        replay = self.server.replay
+        host, _, path = urlparse(self.path).path.lstrip("/").partition("/")
+
+        if replay.throttled():
+            replay.count("throttled")
+            return self.send_error(429)
+        if replay.latency or replay.jitter:
+            time.sleep(replay.latency + replay.random.uniform(0, replay.jitter))
+        if replay.roll(replay.timeout_rate):
+            replay.count("timed_out")
+            time.sleep(replay.timeout_delay)
+            return self.send_error(504)
+
+        target = replay.capture_path(host, path)
+        missing = any(d in path for d in replay.missing_dates) or replay.roll(
+            replay.not_found_rate
+        )
+        if not missing and not target.is_file() and replay.record:
+            missing = not replay.fetch_upstream(host, path, target)
+        if missing or not target.is_file():
+            replay.count("not_found")
+            return self.send_error(404)
+
+        body = target.read_bytes()
+        self.send_response(200)
+        self.send_header(
+            "Content-Type",
+            mimetypes.guess_type(target.name)[0] or "application/octet-stream",
+        )
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        replay.count("served")
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
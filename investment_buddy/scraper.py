@@ -1,54 +1,73 @@
 import requests
+from functools import lru_cache
 from typing import Union
-import os
 import pandas as pd
 import logging
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from tqdm import tqdm
-import openpyxl
-from openpyxl.utils.dataframe import dataframe_to_rows
-import time
 
-from googlesearch import search
+from investment_buddy.config import data_path, rewrite_url
+from investment_buddy.journal import RunJournal
 
-# from duckduckgo_search import DDGS
+# googlesearch, tqdm and openpyxl are only needed by some stages, so they are imported
+# where they are used to keep `import investment_buddy.scraper` cheap.
 
 logger = logging.getLogger(__name__)
-tqdm.pandas()
-os.environ["WDM_LOG_LEVEL"] = "0"
 
 
-class PageFinder(object):
-    keys_dict = pd.read_csv("data/keys.csv").set_index("field").to_dict(orient="index")
-    keys_dict = {k: v["identifier"] for k, v in keys_dict.items()}
-    check_element = keys_dict["market_cap"].replace(".", "")
+@lru_cache(maxsize=None)
+def load_keys(path):
+    keys_dict = pd.read_csv(path).set_index("field").to_dict(orient="index")
+    return {k: v["identifier"] for k, v in keys_dict.items()}
+
+
+@lru_cache(maxsize=None)
+def load_url_index(path):
+    df_url_index = pd.read_csv(path).rename(columns=str.lower)
+    return df_url_index.set_index("isin")["url"].to_dict()
 
+
+class PageFinder(object):
     def __init__(self, isin, symbol):
         self.isin, self.symbol = str(isin), str(symbol)
         self.url = self.home_content = self.ratios_url = None
         self.props = dict()
-        df_url_index = pd.read_csv("./data/company_info.csv").rename(columns=str.lower)
-        self.isin_url_dict = df_url_index.set_index("isin")["url"].to_dict()
+        self.keys_dict = load_keys(data_path("keys.csv"))
+        self.check_element = self.keys_dict["market_cap"].replace(".", "")
+        self.isin_url_dict = load_url_index(data_path("company_info.csv"))
         self.try_finding_info()
 
     def get_parsed_content(self, url):
-        return BeautifulSoup(requests.get(url).content, features="lxml")
+        # a missing sub-page (e.g. consolidated ratios for a company that only files
+        # standalone statements) parses as empty, so its series come out as [None] * 5;
+        # only throttling and server errors fail the company.
+        resp = requests.get(rewrite_url(url))
+        if resp.status_code == 429 or resp.status_code >= 500:
+            resp.raise_for_status()
+        if not resp.ok:
+            return BeautifulSoup("", features="lxml")
+        return BeautifulSoup(resp.content, features="lxml")
 
+    # Only a search with no usable result or a missing page counts as "not found". Search
+    # and network failures (rate limiting included) and a missing googlesearch package
+    # raise, so that scrape_candidate marks the attempt as failed and it is retried rather
+    # than journaled as empty.
     def validate_and_gather_info(self, symbol, isin):
         if isin in self.isin_url_dict:
             url = self.isin_url_dict[isin]
         else:
             search_term = f'"{isin}" {symbol} site:https://www.moneycontrol.com/india/stockpricequote/'
-            try:
-                results = list(search(search_term, num_results=5))
-                url = [r for r in results if len(r) > 52][0]
-            except Exception as e:
+            from googlesearch import search
+
+            results = [r for r in search(search_term, num_results=5) if len(r) > 52]
+            if not results:
                 return False
+            url = results[0]
 
-        content = str(requests.get(url).content)
+        resp = requests.get(rewrite_url(url))
+        if resp.status_code == 404:
+            return False
+        resp.raise_for_status()
+        content = str(resp.content)
         if (
             (symbol.lower() in content.lower()) or (isin.lower() in content.lower())
         ) and (self.check_element in content):
@@ -124,20 +143,55 @@ class PageFinder(object):
         return f"PageFinder({self.isin}, {self.symbol}, {self.url})"
 
 
-def scrape_metrics(df_filtered, date_str):
-    df_filtered = df_filtered.assign(
-        pf=lambda df: df.progress_apply(
-            lambda row: PageFinder(row["isin"], row["symbol"]), axis=1
-        ),
+def scrape_candidate(isin, symbol):
+    # None (rather than empty props) marks a failed attempt so that it is not journaled
+    # and gets retried on resume.
+    try:
+        return PageFinder(isin, symbol).props
+    except Exception as err:
+        logger.warning(f"\nFailed scraping {symbol} - {isin}: {err}")
+        return None
+
+
+def candidate_keys(df):
+    return [(str(isin), str(symbol)) for isin, symbol in zip(df["isin"], df["symbol"])]
+
+
+def scrape_metrics(df_filtered, date_str, resume=True):
+    from tqdm import tqdm
+
+    journal = RunJournal(date_str)
+    if not resume:
+        journal.reset()
+    done = journal.load()
+    pending = [k for k in dict.fromkeys(candidate_keys(df_filtered)) if k not in done]
+    logger.info(
+        f"{len(pending)} of {len(df_filtered)} candidates left to scrape, journal at {journal.path}"
+    )
+    for isin, symbol in tqdm(pending):
+        props = scrape_candidate(isin, symbol)
+        if props is not None:
+            journal.append(isin, symbol, props)
+    write_journal_report(df_filtered, date_str)
+
+
+def write_journal_report(df_filtered, date_str):
+    done = RunJournal(date_str).load()
+    props = pd.Series(
+        [done.get(k, dict()) for k in candidate_keys(df_filtered)],
+        index=df_filtered.index,
+        dtype=object,
     )
+    write_report(df_filtered, props, date_str)
+
+
+def write_report(df_filtered, props, date_str):
+    import openpyxl
+    from openpyxl.utils.dataframe import dataframe_to_rows
+
     # we query only for stocks where data was successfully scraped as they are easier to split into columns
-    # This works even during merging with the df_filtered because the indix is left unchanged and that makes
+    # This works even during merging with the df_filtered because props shares its index and that makes
     # sure the alignment happens correctly.
-    df = (
-        df_filtered.pf.apply(lambda pf: pf.props)
-        .apply(pd.Series)
-        .query("market_cap.notna()", engine="python")
-    )
     cols = [
         "consolidated_rnw",
         "standalone_rnw",
@@ -148,9 +202,13 @@ def scrape_metrics(df_filtered, date_str):
         "consolidated_de",
         "standalone_de",
     ]
+    # explicit columns so that the report still builds when nothing was found
+    df = pd.DataFrame(
+        props.tolist(), index=props.index, columns=["market_cap"] + cols
+    ).query("market_cap.notna()", engine="python")
     for b, col in enumerate(cols):
         names = [f"{col.replace('_', ' ')}{i}" for i in range(5, 0, -1)]
-        df[names] = pd.DataFrame(df[col].tolist(), index=df.index)
+        df[names] = pd.DataFrame(df[col].tolist(), index=df.index, columns=names)
         df[f"BLANK {b}"] = ""
     df = df.drop(columns=cols)
 
@@ -168,14 +226,15 @@ def scrape_metrics(df_filtered, date_str):
         .sort_values("no_data")
     )
 
-    df_final.loc[~df_final.no_data] = df_final.loc[~df_final.no_data].fillna("")
-    df_final.loc[df_final.no_data] = df_final.loc[df_final.no_data].fillna(
-        "No Match in Money Control"
-    )
-    df_final = df_final.drop(columns="no_data").rename(columns=str.upper)
+    # object dtype so that the numeric columns can take the placeholder strings
+    no_data = df_final.pop("no_data")
+    df_final = df_final.astype(object)
+    df_final.loc[~no_data] = df_final.loc[~no_data].fillna("")
+    df_final.loc[no_data] = df_final.loc[no_data].fillna("No Match in Money Control")
+    df_final = df_final.rename(columns=str.upper)
 
     # Load the file
-    wb = openpyxl.load_workbook("data/results_template.xlsx")
+    wb = openpyxl.load_workbook(data_path("results_template.xlsx"))
     ws = wb.active
 
     # Convert the dataframe into rows
@@ -189,9 +248,10 @@ def scrape_metrics(df_filtered, date_str):
     # Save the worksheet as a (*.xlsx) file
     wb.template = False
     save_path = (
-        f"data/{date_str}.xlsx"
+        data_path(f"{date_str}.xlsx")
         if date_str == "latest"
-        else f"data/final/{date_str}.xlsx"
+        else data_path("final", f"{date_str}.xlsx")
     )
+    save_path.parent.mkdir(parents=True, exist_ok=True)
     wb.save(save_path)
     logger.info(f"Saved data to {save_path}")
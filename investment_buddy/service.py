@@ -0,0 +1,239 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pendulum
+import requests
+
+from investment_buddy.config import data_path
+from investment_buddy.filterer import (
+    DataFilters,
+    prepare_prices,
+    price_files,
+    read_price_file,
+    reconcile_bse,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Raised for malformed query input so that the HTTP handler answers 400 instead of 500.
+class BadRequest(ValueError):
+    pass
+
+
+def parse_as_of(as_of):
+    if not as_of:
+        return pendulum.today()
+    try:
+        return pendulum.from_format(as_of, "YYYYMMDD")
+    except ValueError:
+        raise BadRequest(f"as_of must be a YYYYMMDD date, got {as_of!r}")
+
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class LRUCache(object):
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.data:
+                return None
+            self.data.move_to_end(key)
+            return self.data[key]
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+# Keeps the daily price files loaded in memory, in a single date-sorted frame, so ad-hoc
+# screens and history lookups do not re-read every file from disk. Files are tracked
+# individually by mtime and size: refresh() only reads days the downloaders added or
+# rewrote since the last call and drops days that were pruned. DataFilters built per
+# request only slice the resident frame; what is cached are the small derived tables:
+# the combined screen per as-of date and the period_ratios rollups per period start.
+class ScreeningService(object):
+    def __init__(self, cache_size: int = 8, backend: str = "pandas"):
+        self.cache_size = cache_size
+        self.backend = backend
+        self.lock = threading.RLock()
+        self.frames = dict()
+        self.stamps = dict()
+        self.df_all = None
+        self.screens = LRUCache(cache_size)
+        # a screen run needs a rollup per period start, plus the history lookups
+        self.ratios = LRUCache(4 * cache_size)
+        self.refresh()
+
+    def refresh(self):
+        with self.lock:
+            stamps = {path: file_stamp(path) for path in price_files()}
+            new_files = sorted(p for p, s in stamps.items() if self.stamps.get(p) != s)
+            removed_files = set(self.frames) - set(stamps)
+            if not new_files and not removed_files:
+                return 0
+            for path in removed_files:
+                del self.frames[path]
+            self.stamps = stamps
+            with ThreadPoolExecutor() as executor:
+                self.frames.update(
+                    zip(new_files, executor.map(read_price_file, new_files))
+                )
+            df_all_org = prepare_prices(pd.concat(self.frames.values()))
+            self.df_all = reconcile_bse(df_all_org).sort_values(
+                "date", kind="stable", ignore_index=True
+            )
+            self.screens.clear()
+            self.ratios.clear()
+            logger.info(
+                f"Loaded {len(new_files)} new or changed and dropped "
+                f"{len(removed_files)} price files"
+            )
+            return len(new_files) + len(removed_files)
+
+    def data_filter(self, as_of=None) -> DataFilters:
+        as_of_date = parse_as_of(as_of)
+        with self.lock:
+            df_all = self.df_all
+        return DataFilters(
+            as_of_date, df_all=df_all, backend=self.backend, ratio_cache=self.ratios
+        )
+
+    def screen(self, as_of=None) -> pd.DataFrame:
+        data_filter = self.data_filter(as_of)
+        df = self.screens.get(data_filter.filter_date)
+        if df is None:
+            data_filter.apply_all_filters(export=False)
+            df = data_filter.df_all_filtered
+            self.screens[data_filter.filter_date] = df
+        return df
+
+    def history(self, symbol, period="quarter", as_of=None) -> pd.DataFrame:
+        if period not in DataFilters.PERIOD_GROUPING:
+            periods = ", ".join(DataFilters.PERIOD_GROUPING)
+            raise BadRequest(f"period must be one of {periods}, got {period!r}")
+        data_filter = self.data_filter(as_of)
+        # rolled up over the whole universe from the first day on file and cached, so
+        # each lookup is only a filter; a security's first period has no lag either way
+        df = data_filter.period_ratios(data_filter.df_all.date.min(), period)
+        return df.query("symbol == @symbol | isin == @symbol")
+
+    def candidates(self, date_str=None, symbol=None) -> pd.DataFrame:
+        if date_str is None:
+            date_str = self.data_filter().date_str
+        path = data_path("filtered", f"{date_str}.xlsx")
+        if path.exists():
+            df = pd.read_excel(path)
+        else:
+            df = self.screen(date_str)
+        if symbol is not None:
+            df = df.query("symbol == @symbol | isin == @symbol")
+        return df
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    def respond(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        service = self.server.service
+        try:
+            if url.path == "/screen":
+                df = service.screen(params.get("as_of"))
+            elif url.path == "/history":
+                if "symbol" not in params:
+                    raise BadRequest("missing parameter 'symbol'")
+                df = service.history(
+                    params["symbol"], params.get("period", "quarter"), params.get("as_of")
+                )
+            elif url.path == "/candidates":
+                df = service.candidates(params.get("date"), params.get("symbol"))
+            elif url.path == "/refresh":
+                return self.respond(200, {"changed_files": service.refresh()})
+            else:
+                return self.respond(404, {"error": f"unknown endpoint {url.path}"})
+        except BadRequest as err:
+            return self.respond(400, {"error": str(err)})
+        except Exception as err:
+            logger.exception(err)
+            return self.respond(500, {"error": str(err)})
+        self.respond(200, json.loads(df.to_json(orient="records", date_format="iso")))
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def serve(host="127.0.0.1", port=8765, refresh_interval=300, backend="pandas"):
+    service = ScreeningService(backend=backend)
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.service = service
+
+    stop = threading.Event()
+
+    def refresh_loop():
+        while not stop.wait(refresh_interval):
+            try:
+                service.refresh()
+            except Exception as err:
+                logger.warning(f"Refresh failed: {err}")
+
+    if refresh_interval:
+        threading.Thread(target=refresh_loop, daemon=True).start()
+    logger.info(f"Screening service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        stop.set()
+        server.server_close()
+
+
+# Thin client for notebooks, e.g. ScreeningClient().screen("20240628")
+class ScreeningClient(object):
+    def __init__(self, url="http://127.0.0.1:8765"):
+        self.url = url.rstrip("/")
+
+    def get(self, endpoint, **params):
+        params = {k: v for k, v in params.items() if v is not None}
+        r = requests.get(f"{self.url}/{endpoint}", params=params)
+        r.raise_for_status()
+        return r.json()
+
+    def screen(self, as_of=None):
+        return pd.DataFrame(self.get("screen", as_of=as_of))
+
+    def history(self, symbol, period="quarter", as_of=None):
+        return pd.DataFrame(self.get("history", symbol=symbol, period=period, as_of=as_of))
+
+    def candidates(self, date_str=None, symbol=None):
+        return pd.DataFrame(self.get("candidates", date=date_str, symbol=symbol))
+
+    def refresh(self):
+        return self.get("refresh")["changed_files"]
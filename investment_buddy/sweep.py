@@ -0,0 +1,82 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+KEYS = ["exchange", "symbol", "isin"]
+
+# Threshold sweeps for the ratio screens. The ratio table is computed once and every
+# combination in the grid is evaluated against it with broadcast comparisons, giving a
+# (combinations x rows) boolean matrix, instead of re-running a screen per setting.
+# Thresholds are named after the DataFilters.apply_* keyword arguments, e.g.
+# min_value_ratio is compared against the value_ratio column.
+
+
+def expand_grid(grid):
+    names = list(grid)
+    values = [np.atleast_1d(grid[name]).tolist() for name in names]
+    return pd.DataFrame(list(itertools.product(*values)), columns=names)
+
+
+def threshold_masks(df_ratios, combos, chunk_size):
+    # chunks over the combinations keep the boolean matrix bounded for large grids
+    columns = {
+        name: df_ratios[name[len("min_") :]].to_numpy(dtype=float, na_value=np.nan)
+        for name in combos.columns
+    }
+    for start in range(0, len(combos), chunk_size):
+        chunk = combos.iloc[start : start + chunk_size]
+        mask = np.ones((len(chunk), len(df_ratios)), dtype=bool)
+        for name, values in columns.items():
+            # NaN compares False, same as the > in the screen queries
+            mask &= values[None, :] > chunk[name].to_numpy(dtype=float)[:, None]
+        yield chunk, mask
+
+
+def key_codes(df):
+    codes, uniques = pd.MultiIndex.from_frame(df[KEYS]).factorize()
+    return codes, uniques
+
+
+def sweep_ratio_screen(df_ratios, grid, chunk_size=64):
+    codes, uniques = key_codes(df_ratios)
+    combos = expand_grid(grid)
+    candidates = []
+    for _, mask in threshold_masks(df_ratios, combos, chunk_size):
+        candidates.extend(list(uniques[np.unique(codes[row])]) for row in mask)
+    return combos.assign(
+        n_hits=[len(c) for c in candidates],
+        candidates=candidates,
+    )
+
+
+def sweep_count_screen(df_ratios, grid, df_traded, chunk_size=64):
+    # row level thresholds pick the qualifying periods, min_n_double is then applied to
+    # the per-security count of those periods. The screens count close_ratio, so periods
+    # where it is missing qualify but are not counted.
+    row_grid = {k: v for k, v in grid.items() if k != "min_n_double"}
+    min_counts = np.atleast_1d(grid["min_n_double"])
+    codes, uniques = key_codes(df_ratios)
+    traded = uniques.isin(pd.MultiIndex.from_frame(df_traded[KEYS]))
+    counted = df_ratios.close_ratio.notna().to_numpy()
+
+    row_combos = expand_grid(row_grid)
+    results = []
+    for chunk, mask in threshold_masks(df_ratios, row_combos, chunk_size):
+        counts = np.zeros((len(chunk), len(uniques)), dtype=int)
+        if len(uniques):
+            counts = pd.DataFrame((mask & counted).T).groupby(codes).sum().to_numpy().T
+        for combo, row_counts in zip(chunk.to_dict("records"), counts):
+            for min_count in min_counts:
+                hits = uniques[(row_counts >= min_count) & traded]
+                results.append(
+                    dict(
+                        combo,
+                        min_n_double=min_count,
+                        n_hits=len(hits),
+                        candidates=list(hits),
+                    )
+                )
+    return pd.DataFrame(
+        results, columns=list(row_grid) + ["min_n_double", "n_hits", "candidates"]
+    )
@@ -35,12 +35,14 @@ def scrape_mc_index():
             href = element.attrs["href"]
             all_links.append((text, href))
 
+    # kept inline (same as crawler.dedupe_links) because this module is also imported
+    # inside the Modal image, which does not ship the investment_buddy package.
     all_links_new = []
-    names = []
+    names = set()
     for name, url in all_links:
         if name not in names:
             all_links_new.append((name, url))
-            names.append(name)
+            names.add(name)
 
     len(all_links), len(all_links_new)
 
@@ -81,11 +83,8 @@ def main():
         all_links = pickle.load(f)
     total = len(all_links)
     df_old_scraped = pd.read_csv("./data/company_info.csv").rename(columns=str.lower)
-    all_links = [
-        (name, url)
-        for name, url in all_links
-        if name not in df_old_scraped.name.tolist()
-    ]
+    old_names = set(df_old_scraped.name)
+    all_links = [(name, url) for name, url in all_links if name not in old_names]
     company_info_ls = [deets for deets in scrape_company_details.starmap(all_links)]
     with open("data/all_companies_list.pkl", "wb") as f:
         pickle.dump(company_info_ls, f)
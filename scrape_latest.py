@@ -5,4 +5,5 @@ import pandas as pd
 logging.basicConfig(level=logging.INFO)
 
 df_filtered = pd.read_excel("data/df_latest_filtered.xlsx")
-scrape_metrics(df_filtered, "latest")
+# "latest" is reused across days, so don't resume from a previous run's journal
+scrape_metrics(df_filtered, "latest", resume=False)